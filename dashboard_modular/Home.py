@@ -3,10 +3,9 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from auth import require_login
+from utils import read_excel, to_datetime, get_file_hash, load_excel_from_github
 from io import BytesIO
-import hashlib
 from datetime import datetime
-import requests
 
 
 st.set_page_config(page_title="Dashboard Home", layout="wide")
@@ -16,17 +15,6 @@ require_login()
 GITHUB_PROJECT_FILE_URL = "https://raw.githubusercontent.com/quicksxope/Dashboard-New/main/data/Data_project_monitoring.xlsx"
 GITHUB_CONTRACT_FILE_URL = "https://raw.githubusercontent.com/quicksxope/Dashboard-New/main/data/data_kontrak_new.xlsx"
 
-def get_file_hash(file):
-    return hashlib.md5(file.getvalue()).hexdigest()
-
-@st.cache_data(ttl=3600)
-def load_excel_from_github(url):
-    response = requests.get(url)
-    if response.status_code == 200:
-        return BytesIO(response.content)
-    else:
-        return None
-
 # --- File uploader logic ---
 uploaded_project_file = st.sidebar.file_uploader("📊 Upload Project Data", type="xlsx", key="project_file")
 uploaded_contract_file = st.sidebar.file_uploader("📁 Upload Contract Data", type="xlsx", key="contract_file")
@@ -40,7 +28,8 @@ if uploaded_project_file:
     project_file = BytesIO(uploaded_project_file.getvalue())
     st.sidebar.markdown(f"🕒 Last Project Upload: {st.session_state.project_upload_time.strftime('%Y-%m-%d %H:%M:%S')}")
 else:
-    project_file = load_excel_from_github(GITHUB_PROJECT_FILE_URL)
+    project_file_bytes = load_excel_from_github(GITHUB_PROJECT_FILE_URL)
+    project_file = BytesIO(project_file_bytes) if project_file_bytes else None
     st.sidebar.info("📥 Using default project file from GitHub")
 
 # --- Contract file ---
@@ -52,7 +41,8 @@ if uploaded_contract_file:
     contract_file = BytesIO(uploaded_contract_file.getvalue())
     st.sidebar.markdown(f"🕒 Last Contract Upload: {st.session_state.contract_upload_time.strftime('%Y-%m-%d %H:%M:%S')}")
 else:
-    contract_file = load_excel_from_github(GITHUB_CONTRACT_FILE_URL)
+    contract_file_bytes = load_excel_from_github(GITHUB_CONTRACT_FILE_URL)
+    contract_file = BytesIO(contract_file_bytes) if contract_file_bytes else None
     st.sidebar.info("📥 Using default contract file from GitHub")
 
 
@@ -189,13 +179,13 @@ overdue_rate = 0.0
 remaining_pct = 0.0
 
 if project_file:
-    dfp = pd.read_excel(pd.ExcelFile(project_file), sheet_name=0)
+    dfp = read_excel(project_file, sheet_name=0)
     dfp.columns = dfp.columns.str.strip()
     dfp['KONTRAK'] = dfp['KONTRAK'].astype(str).str.upper().str.strip()
     dfp['STATUS'] = dfp['STATUS'].astype(str).str.upper().str.strip()
     dfp['% COMPLETE'] = dfp['% COMPLETE'].apply(lambda x: x * 100 if x <= 1 else x)
-    dfp['START'] = pd.to_datetime(dfp['START'], errors='coerce')
-    dfp['PLAN END'] = pd.to_datetime(dfp['PLAN END'], errors='coerce')
+    dfp['START'] = to_datetime(dfp['START'])
+    dfp['PLAN END'] = to_datetime(dfp['PLAN END'])
 
     total_projects = dfp['KONTRAK'].nunique()
     avg_completion = dfp['% COMPLETE'].mean()
@@ -227,7 +217,7 @@ if project_file:
         
 
 if contract_file:
-    df = pd.read_excel(contract_file)
+    df = read_excel(contract_file)
     df.columns = df.columns.str.strip()
     df.rename(columns={
         'Start Date': 'START',
@@ -240,8 +230,8 @@ if contract_file:
         'STATUS': 'STATUS'
     }, inplace=True)
 
-    df['START'] = pd.to_datetime(df['START'], errors='coerce')
-    df['END'] = pd.to_datetime(df['END'], errors='coerce')
+    df['START'] = to_datetime(df['START'])
+    df['END'] = to_datetime(df['END'])
     df['CONTRACT_VALUE'] = pd.to_numeric(df['CONTRACT_VALUE'], errors='coerce')
     df['REALIZATION'] = pd.to_numeric(df['REALIZATION'], errors='coerce')
     df['REALIZED_PCT'] = pd.to_numeric(df['REALIZED_PCT'], errors='coerce') * 100
@@ -2,23 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta, date
-import unicodedata
 import re
 import base64
 import io
 from io import BytesIO
 import numpy as np
 import plotly.graph_objects as go
-import hashlib
 from datetime import datetime
-import requests
-
-def clean_text(x):
-    if pd.isna(x):
-        return ''
-    x = unicodedata.normalize('NFKD', str(x)).encode('ascii', 'ignore').decode('utf-8')
-    x = re.sub(r'\s+', ' ', x)
-    return x.strip().upper()
+from utils import clean_text, get_file_hash, load_excel_from_github
 
 st.set_page_config(page_title="📊 PT INCA Dashboard", layout="wide")
 
@@ -498,17 +489,6 @@ def main():
         </head>
     """, unsafe_allow_html=True)
     
-    def get_file_hash(file):
-        return hashlib.md5(file.getvalue()).hexdigest()
-
-    @st.cache_data(ttl=3600)
-    def load_excel_from_github(url):
-        response = requests.get(url)
-        if response.status_code == 200:
-            return BytesIO(response.content)
-        else:
-            return None
-
     GITHUB_PROJECT_FILE_URL = "https://raw.githubusercontent.com/quicksxope/Dashboard-New/main/data/Data_project_monitoring.xlsx"
 
     uploaded_project_file = st.sidebar.file_uploader("📊 Upload Project Data", type="xlsx", key="project_file")
@@ -521,7 +501,8 @@ def main():
         project_file = BytesIO(uploaded_project_file.getvalue())
         st.sidebar.markdown(f"🕒 Last Project Upload: {st.session_state.project_upload_time.strftime('%Y-%m-%d %H:%M:%S')}")
     else:
-        project_file = load_excel_from_github(GITHUB_PROJECT_FILE_URL)
+        project_file_bytes = load_excel_from_github(GITHUB_PROJECT_FILE_URL)
+        project_file = BytesIO(project_file_bytes) if project_file_bytes else None
         st.sidebar.info("📥 Using default project file from GitHub")
 
     if not project_file:
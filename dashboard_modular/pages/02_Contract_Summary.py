@@ -1,44 +1,45 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from io import BytesIO
-import hashlib
 from datetime import datetime
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # --- Config & Auth ---
 st.set_page_config(page_title="📁 Contract Summary Dashboard", layout="wide")
 from auth import require_login
+from utils import read_excel, to_datetime, get_file_hash, load_excel_from_github
 require_login()
 
 # --- File Sources ---
 GITHUB_FINANCIAL_FILE_URL = "https://raw.githubusercontent.com/quicksxope/Dashboard-New/main/data/financial_progress.xlsx"
 GITHUB_CONTRACT_FILE_URL = "https://raw.githubusercontent.com/quicksxope/Dashboard-New/main/data/data_kontrak_new.xlsx"
 
-def get_file_hash(file):
-    return hashlib.md5(file.getvalue()).hexdigest()
-
-@st.cache_data(ttl=3600)
-def load_excel_from_github(url):
-    response = requests.get(url)
-    if response.status_code == 200:
-        return BytesIO(response.content)
-    return None
-
 # --- Upload File ---
 uploaded_financial_file = st.sidebar.file_uploader("📊 Upload Financial Data", type="xlsx", key="financial_file")
 uploaded_contract_file = st.sidebar.file_uploader("📁 Upload Contract Data", type="xlsx", key="contract_file")
 
+# Whichever files weren't uploaded come from GitHub; the downloads are network-bound,
+# so run them side by side
+with ThreadPoolExecutor(max_workers=2) as pool:
+    financial_fetch = None if uploaded_financial_file else pool.submit(load_excel_from_github, GITHUB_FINANCIAL_FILE_URL)
+    contract_fetch = None if uploaded_contract_file else pool.submit(load_excel_from_github, GITHUB_CONTRACT_FILE_URL)
+
 if uploaded_financial_file:
     file_hash = get_file_hash(uploaded_financial_file)
     if st.session_state.get("project_file_hash") != file_hash:
         st.session_state.project_file_hash = file_hash
         st.session_state.project_upload_time = datetime.now()
     financial_file = BytesIO(uploaded_financial_file.getvalue())
+    financial_hash = file_hash
     st.sidebar.markdown(f"🕒 Last Project Upload: {st.session_state.project_upload_time.strftime('%Y-%m-%d %H:%M:%S')}")
 else:
-    financial_file = load_excel_from_github(GITHUB_FINANCIAL_FILE_URL)
+    financial_file_bytes = financial_fetch.result()
+    financial_file = BytesIO(financial_file_bytes) if financial_file_bytes else None
+    financial_hash = get_file_hash(financial_file) if financial_file else None
     st.sidebar.info("📥 Using default project file from GitHub")
 
 if uploaded_contract_file:
@@ -47,9 +48,12 @@ if uploaded_contract_file:
         st.session_state.contract_file_hash = file_hash
         st.session_state.contract_upload_time = datetime.now()
     contract_file = BytesIO(uploaded_contract_file.getvalue())
+    contract_hash = file_hash
     st.sidebar.markdown(f"🕒 Last Contract Upload: {st.session_state.contract_upload_time.strftime('%Y-%m-%d %H:%M:%S')}")
 else:
-    contract_file = load_excel_from_github(GITHUB_CONTRACT_FILE_URL)
+    contract_file_bytes = contract_fetch.result()
+    contract_file = BytesIO(contract_file_bytes) if contract_file_bytes else None
+    contract_hash = get_file_hash(contract_file) if contract_file else None
     st.sidebar.info("📥 Using default contract file from GitHub")
 
 # --- UI Header ---
@@ -69,112 +73,107 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# --- Card Styles ---
+# Shared styles go out once per run; the cards below only carry class names
+CARD_CSS = """
+<style>
+.section-title {
+    background: linear-gradient(to right, #3498db, #1abc9c); color: white;
+    padding: 12px 15px; border-radius: 10px 10px 0 0; font-weight: 600; font-size: 1.2rem;
+}
+.metric-card {
+    padding: 1.2rem; background: linear-gradient(135deg, var(--card-bg, #6C5CE7), #00CEC9);
+    border-radius: 1.5rem; box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2); text-align: center; height: 100%;
+}
+.metric-card .icon { font-size: 1.8rem; }
+.metric-card .title { font-size: 1.1rem; font-weight: 600; color: white; }
+.metric-card .value { font-size: 2rem; font-weight: 700; color: white; }
+.metric-card .sub { color: #DADDE1; font-size: 0.85rem; }
+</style>
+"""
+st.markdown(CARD_CSS, unsafe_allow_html=True)
+
 # --- Section Card ---
+# A handful of fixed titles, so each header string is built once per process
+@lru_cache(maxsize=32)
+def section_header_html(title):
+    return f'<div class="section-title">{title}</div>'
+
 def section_card(title=None):
     section = st.container()
     if title:
-        section.markdown(f"""
-        <div style=\"background: linear-gradient(to right, #3498db, #1abc9c); color: white; padding: 12px 15px; border-radius: 10px 10px 0 0; font-weight: 600; font-size: 1.2rem;\">
-            {title}
-        </div>
-        """, unsafe_allow_html=True)
+        section.markdown(section_header_html(title), unsafe_allow_html=True)
     return section
 
 # --- Metric Card ---
 def metric_card(title, value, sub, icon="✅", bg="#6C5CE7"):
-    gradient = f"linear-gradient(135deg, {bg}, #00CEC9)"
-    return f"""
-    <div class=\"metric-card\" style=\"padding:1.2rem; background:{gradient}; border-radius:1.5rem; box-shadow:0 4px 12px rgba(0, 0, 0, 0.2); text-align:center; height:100%;\">
-        <div style=\"font-size:1.8rem;\">{icon}</div>
-        <div style=\"font-size:1.1rem; font-weight:600; color:white;\">{title}</div>
-        <div style=\"font-size:2rem; font-weight:700; color:white;\">{value}</div>
-        <div style=\"color:#DADDE1; font-size:0.85rem;\">{sub}</div>
-    </div>
-    """
+    return (
+        f'<div class="metric-card" style="--card-bg:{bg}">'
+        f'<div class="icon">{icon}</div><div class="title">{title}</div>'
+        f'<div class="value">{value}</div><div class="sub">{sub}</div></div>'
+    )
 
 # --- Chart Utils ---
-def get_color(pct): return '#2ECC71' if pct >= 50 else '#E74C3C'
+PIE_MAX_SLICES = 6
+
+def get_colors(pct): return np.where(np.asarray(pct, dtype='float64') >= 50, '#2ECC71', '#E74C3C')
 
 def build_kpi_bar(df_subset, title):
-    fig = go.Figure()
-
-    show_legend_green = True
-    show_legend_red = True
-    show_legend_remaining = True
-
-    for _, row in df_subset.iterrows():
-        color = get_color(row['REALIZED_PCT'])
-        kontrak_name = row['KONTRAK']
-        realized = row['REALIZATION']
-        remaining = row['REMAINING']
-        total = row['CONTRACT_VALUE']
-        pct = row['REALIZED_PCT']
-
-        # --- Realized Bar ---
-        if pct >= 50:
-            fig.add_trace(go.Bar(
-                y=[kontrak_name],
-                x=[realized],
-                name="REALIZED ≥ 50%" if show_legend_green else None,
-                orientation='h',
-                marker=dict(color="#2ECC71"),
-                text=f"{pct:.1f}%",
-                textposition='inside',
-                showlegend=show_legend_green,
-                hovertemplate=(
-                    f"<b>{kontrak_name}</b><br>"
-                    f"Total Contract: {total:.1f} M<br>"
-                    f"Realized: {realized:.1f} M<br>"
-                    f"Remaining: {remaining:.1f} M<br>"
-                    f"% Realized: {pct:.1f}%<extra></extra>"
-                )
-            ))
-            show_legend_green = False
-        else:
-            fig.add_trace(go.Bar(
-                y=[kontrak_name],
-                x=[realized],
-                name="REALIZED < 50%" if show_legend_red else None,
-                orientation='h',
-                marker=dict(color="#E74C3C"),
-                text=f"{pct:.1f}%",
-                textposition='inside',
-                showlegend=show_legend_red,
-                hovertemplate=(
-                    f"<b>{kontrak_name}</b><br>"
-                    f"Total Contract: {total:.1f} M<br>"
-                    f"Realized: {realized:.1f} M<br>"
-                    f"Remaining: {remaining:.1f} M<br>"
-                    f"% Realized: {pct:.1f}%<extra></extra>"
-                )
-            ))
-            show_legend_red = False
+    # Inputs come from our own DataFrame, so skip plotly's per-property validation
+    fig = go.Figure(_validate=False)
+
+    kontrak = df_subset['KONTRAK']
+    pct = df_subset['REALIZED_PCT']
+    # Per-point values travel as customdata; plotly.js formats text/hover client-side
+    customdata = df_subset[['CONTRACT_VALUE', 'REALIZATION', 'REMAINING', 'REALIZED_PCT']].to_numpy()
+    hovertemplate = (
+        "<b>%{y}</b><br>"
+        "Total Contract: %{customdata[0]:.1f} M<br>"
+        "Realized: %{customdata[1]:.1f} M<br>"
+        "Remaining: %{customdata[2]:.1f} M<br>"
+        "% Realized: %{customdata[3]:.1f}%<extra></extra>"
+    )
 
-        # --- Remaining Bar ---
+    # --- Realized Bars (one trace per color band) ---
+    high = (pct >= 50).to_numpy()
+    for mask, name, color in [
+        (high, "REALIZED ≥ 50%", "#2ECC71"),
+        (~high, "REALIZED < 50%", "#E74C3C"),
+    ]:
         fig.add_trace(go.Bar(
-            y=[kontrak_name],
-            x=[remaining],
-            name="REMAINING" if show_legend_remaining else None,
+            y=kontrak[mask],
+            x=df_subset['REALIZATION'][mask],
+            customdata=customdata[mask],
+            name=name,
             orientation='h',
-            marker=dict(color="#D0D3D4"),
-            text=f"{remaining:.1f} M",
+            marker=dict(color=color),
+            texttemplate="%{customdata[3]:.1f}%",
             textposition='inside',
-            showlegend=show_legend_remaining,
-            hovertemplate=(
-                f"<b>{kontrak_name}</b><br>"
-                f"Total Contract: {total:.1f} M<br>"
-                f"Realized: {realized:.1f} M<br>"
-                f"Remaining: {remaining:.1f} M<br>"
-                f"% Realized: {pct:.1f}%<extra></extra>"
-            )
+            showlegend=bool(mask.any()),
+            hovertemplate=hovertemplate,
+            _validate=False
         ))
-        show_legend_remaining = False
+
+    # --- Remaining Bars ---
+    fig.add_trace(go.Bar(
+        y=kontrak,
+        x=df_subset['REMAINING'],
+        customdata=customdata,
+        name="REMAINING",
+        orientation='h',
+        marker=dict(color="#D0D3D4"),
+        texttemplate="%{x:.1f} M",
+        textposition='inside',
+        showlegend=not df_subset.empty,
+        hovertemplate=hovertemplate,
+        _validate=False
+    ))
 
     fig.update_layout(
         barmode='stack',
-        title=title,
-        xaxis=dict(title="Contract Value (Millions)", tickformat=".0f"),
-        yaxis=dict(automargin=True),
+        title=dict(text=title),
+        xaxis=dict(title=dict(text="Contract Value (Millions)"), tickformat=".0f"),
+        yaxis=dict(automargin=True, categoryorder='array', categoryarray=kontrak),
         height=600,
         margin=dict(l=300, r=50, t=60, b=50),
         dragmode=False,
@@ -188,53 +187,293 @@ def build_kpi_bar(df_subset, title):
     )
     return fig
 
+def build_financial_bar(df_subset, title="Progress Pembayaran (%)"):
+    fig = go.Figure(_validate=False)
+
+    vendor = df_subset['Vendor']
+    pct = df_subset['REALIZED_PCT']
+    remaining_pct = 100 - pct
+    customdata = np.column_stack([
+        df_subset['CONTRACT_VALUE'].to_numpy(dtype='float64'),
+        df_subset['REALIZATION'].to_numpy(dtype='float64'),
+        df_subset['REMAINING'].to_numpy(dtype='float64'),
+        pct.to_numpy(dtype='float64'),
+        remaining_pct.to_numpy(dtype='float64'),
+    ])
+    hovertemplate = (
+        "<b>%{y}</b><br>"
+        "Total Kontrak: Rp %{customdata[0]:,.0f}<br>"
+        "Terbayarkan: Rp %{customdata[1]:,.0f} (%{customdata[3]:.1f}%)<br>"
+        "Sisa: Rp %{customdata[2]:,.0f} (%{customdata[4]:.1f}%)<extra></extra>"
+    )
 
-# --- Main Processing ---
-if contract_file:
-    df = pd.read_excel(contract_file)
+    # Bar: Realisasi (Hijau/Merah per vendor)
+    fig.add_trace(go.Bar(
+        y=vendor,
+        x=pct,
+        customdata=customdata,
+        name='REALIZED (%)',
+        orientation='h',
+        marker_color=get_colors(pct),
+        texttemplate="%{x:.1f}%",
+        textposition='inside',
+        hovertemplate=hovertemplate,
+        showlegend=True,
+        _validate=False
+    ))
+
+    # Bar: Sisa (Abu)
+    fig.add_trace(go.Bar(
+        y=vendor,
+        x=remaining_pct,
+        customdata=customdata,
+        name='REMAINING (%)',
+        orientation='h',
+        marker_color="#D0D3D4",
+        texttemplate="%{x:.1f}%",
+        textposition='inside',
+        hovertemplate=hovertemplate,
+        showlegend=True,
+        _validate=False
+    ))
+
+    fig.update_layout(
+        barmode='stack',
+        title=dict(text=title),
+        xaxis=dict(title=dict(text="Progress (%)"), range=[0, 100]),
+        yaxis=dict(title=dict(text=""), automargin=True),
+        height=700,
+        margin=dict(l=300, r=50, t=60, b=50),
+        dragmode=False,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig
+
+
+# Above this many contracts the SVG bars of px.timeline dominate browser render time
+GANTT_WEBGL_THRESHOLD = 300
+
+def build_gantt(df_plot):
+    hover_cols = ['DURATION', 'PROGRESS', 'TIME_GONE']
+    if len(df_plot) <= GANTT_WEBGL_THRESHOLD:
+        fig = px.timeline(df_plot, x_start='START', x_end='END', y='KONTRAK', color='STATUS',
+                          hover_data=hover_cols)
+    else:
+        # One WebGL trace per STATUS: every contract is a START-END segment, separated by NaN gaps
+        fig = go.Figure()
+        for status, group in df_plot.groupby('STATUS', observed=True, sort=False):
+            n = len(group)
+            x = np.full(3 * n, np.nan)
+            x[0::3] = to_epoch_ns(group['START']) / 1e6
+            x[1::3] = to_epoch_ns(group['END']) / 1e6
+            y = np.repeat(group['KONTRAK'].to_numpy(dtype=object), 3)
+            y[2::3] = None
+            fig.add_trace(go.Scattergl(
+                x=x,
+                y=y,
+                mode='lines',
+                name=str(status),
+                line=dict(width=10),
+                customdata=np.repeat(group[hover_cols].to_numpy(dtype='float64'), 3, axis=0),
+                hovertemplate=(
+                    f"STATUS={status}<br>KONTRAK=%{{y}}<br>DATE=%{{x}}<br>"
+                    "DURATION=%{customdata[0]}<br>PROGRESS=%{customdata[1]}<br>"
+                    "TIME_GONE=%{customdata[2]}<extra></extra>"
+                )
+            ))
+        fig.update_layout(xaxis=dict(type='date'), yaxis=dict(title=dict(text='KONTRAK')),
+                          legend=dict(title=dict(text='STATUS')))
+    fig.update_yaxes(autorange='reversed')
+    return fig
+
+
+# --- Status Filter Table ---
+# A fragment, so changing the status only reruns this table, not the whole page
+@st.fragment
+def status_table(df_display, status_groups):
+    status_filter = st.selectbox("Select Status", options=["All"] + df_display['STATUS'].cat.categories.tolist())
+    if status_filter == "All":
+        filtered_df = df_display
+    else:
+        filtered_df = df_display.take(status_groups.get(status_filter, []))
+
+    st.dataframe(filtered_df, use_container_width=True, hide_index=True)
+
+
+# --- Data Loading ---
+CONTRACT_COLUMNS = [
+    'KONTRAK', 'STATUS', 'Start Date', 'End Date', 'PROGRESS ACTUAL',
+    'Nilai Kontrak 2023-2024', 'Realisasi On  2023-2024',
+]
+CONTRACT_RENAMES = {
+    'Start Date': 'START', 'End Date': 'END', 'PROGRESS ACTUAL': 'PROGRESS',
+    'Nilai Kontrak 2023-2024': 'CONTRACT_VALUE', 'Realisasi On  2023-2024': 'REALIZATION',
+}
+# Keyed by stripped header, so applied after the strip rather than through read_excel's dtype=
+CONTRACT_DTYPES = {'KONTRAK': 'string[pyarrow]', 'STATUS': 'category'}
+FINANCIAL_COLUMNS = ['Vendor', 'CONTRACT_VALUE', 'REALIZATION']
+FINANCIAL_DTYPES = {'Vendor': 'string[pyarrow]', 'CONTRACT_VALUE': 'float64', 'REALIZATION': 'float64'}
+GANTT_COLUMNS = ['START', 'END', 'KONTRAK', 'STATUS', 'DURATION', 'PROGRESS', 'TIME_GONE']
+TIME_GONE_BINS = [-1, 30, 50, 80, 100]
+TIME_GONE_LABELS = ['<30%', '30-50%', '50-80%', '>80%']
+DISPLAY_COLUMNS = ['KONTRAK', 'START', 'END', 'DURATION', 'STATUS', 'PROGRESS', 'TIME_GONE']
+
+NS_PER_DAY = 86_400_000_000_000
+
+def to_epoch_ns(col):
+    # Nanoseconds since epoch as float64, with NaT mapped to NaN
+    values = col.to_numpy(dtype='datetime64[ns]')
+    ns = values.view('i8').astype('f8')
+    ns[np.isnat(values)] = np.nan
+    return ns
+
+def add_realization_columns(df):
+    # REMAINING / REALIZED_PCT from CONTRACT_VALUE and REALIZATION, on plain float64 arrays
+    contract_value = df['CONTRACT_VALUE'].to_numpy(dtype='float64')
+    realization = df['REALIZATION'].to_numpy(dtype='float64')
+    df['REMAINING'] = np.maximum(contract_value - realization, 0)
+    realization = np.maximum(realization, 0)
+    df['REALIZATION'] = realization
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['REALIZED_PCT'] = np.where(contract_value > 0, np.round(realization / contract_value * 100, 1), 0.0)
+    return df
+
+# Cached per file hash; the underscore keeps Streamlit from re-hashing the raw bytes
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_contracts(file_hash, _file_bytes):
+    df = read_excel(
+        BytesIO(_file_bytes),
+        sheet_name=0,
+        usecols=lambda c: str(c).strip() in CONTRACT_COLUMNS,
+    )
     df.columns = [str(c).strip() for c in df.columns]
-    df.rename(columns={'Start Date': 'START', 'End Date': 'END', 'PROGRESS ACTUAL': 'PROGRESS'}, inplace=True)
-    df['START'] = pd.to_datetime(df['START'], errors='coerce')
-    df['END'] = pd.to_datetime(df['END'], errors='coerce')
-    df['DURATION'] = (df['END'] - df['START']).dt.days
+    df = df.astype(CONTRACT_DTYPES)
+    df.rename(columns=CONTRACT_RENAMES, inplace=True)
+    # STATUS has a handful of distinct values; normalise the labels (not every row)
+    # and keep it as int8 codes for counting/filtering
+    status = df['STATUS'].astype('category')
+    labels = status.cat.categories
+    df['STATUS'] = status.map(dict(zip(labels, labels.astype(str).str.strip().str.upper()))).astype('category')
+    # Text cells ('-', 'N/A') in the progress column become NaN rather than strings
     df['PROGRESS'] = pd.to_numeric(df['PROGRESS'], errors='coerce')
-    today = pd.Timestamp.today()
-    df['TIME_GONE'] = ((today - df['START']) / (df['END'] - df['START'])).clip(0, 1) * 100
+    df['START'] = to_datetime(df['START'])
+    df['END'] = to_datetime(df['END'])
+    start, end = to_epoch_ns(df['START']), to_epoch_ns(df['END'])
+    span = end - start
+    today = np.float64(pd.Timestamp.today().value)
+    # Whole days like .dt.days, nullable so undated rows stay <NA>
+    df['DURATION'] = pd.array(np.floor(span / NS_PER_DAY), dtype='Int64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['TIME_GONE'] = np.clip((today - start) / span, 0, 1) * 100
+
+    # Bucket TIME_GONE into the progress categories; NaN and out-of-range rows are left out
+    time_gone = df['TIME_GONE'].to_numpy(dtype='float64')
+    in_range = (time_gone > TIME_GONE_BINS[0]) & (time_gone <= TIME_GONE_BINS[-1])
+    time_gone_codes = np.digitize(time_gone[in_range], TIME_GONE_BINS[1:-1], right=True)
+    progress_counts = pd.DataFrame({
+        'Progress Range': TIME_GONE_LABELS,
+        'Count': np.bincount(time_gone_codes, minlength=len(TIME_GONE_LABELS)),
+    })
+
+    # One pass over STATUS; the metric cards and the pie chart all read from these counts
+    status_counts = df['STATUS'].value_counts()
+    status_labels = status_counts.index.astype(str)
+    metrics = {
+        'total': len(df),
+        'active': int(status_counts.get('ACTIVE', 0)),
+        'non_active': int(status_counts[status_labels.str.contains('NON ACTIVE', regex=False)].sum()),
+        'adendum': int(status_counts[status_labels.str.contains('ADENDUM', regex=False)].sum()),
+    }
+
+    # Gantt input: only the plotted columns, rows with both dates, ordered by START
+    dated = np.flatnonzero(~(np.isnan(start) | np.isnan(end)))
+    dated = dated[np.argsort(start[dated], kind='stable')]
+    df_gantt = df[GANTT_COLUMNS].iloc[dated]
+
+    # Sorted once per file; the status filter only has to slice it
+    df_display = df[DISPLAY_COLUMNS].sort_values('END').reset_index(drop=True)
+    # Row positions per status, ascending, so each filtered slice keeps the END order
+    status_groups = df_display.groupby('STATUS', observed=True).indices
+
+    # KPI bar inputs, ranked by contract value once per file
+    df_chart = (
+        df[['KONTRAK', 'CONTRACT_VALUE', 'REALIZATION']]
+        .dropna(subset=['CONTRACT_VALUE', 'REALIZATION'])
+    )
+    add_realization_columns(df_chart)
+    df_chart.sort_values(by='CONTRACT_VALUE', ascending=False, inplace=True)
+
+    return {
+        'display': df_display,
+        'status_groups': status_groups,
+        'gantt': df_gantt,
+        'status_counts': status_counts,
+        'metrics': metrics,
+        'progress_counts': progress_counts,
+        'top5': df_chart.head(5),
+        'others': df_chart.iloc[5:],
+    }
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_financials(file_hash, _file_bytes):
+    df = read_excel(
+        BytesIO(_file_bytes),
+        sheet_name=0,
+        usecols=lambda c: str(c).strip() in FINANCIAL_COLUMNS,
+    )
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.astype(FINANCIAL_DTYPES)
+    return add_realization_columns(df)
+
+# Figures depend only on the file contents, so build them once per hash and hand the
+# same object to every rerun; plotly_chart only reads the figure it is given
+@st.cache_resource(ttl=3600, show_spinner=False)
+def gantt_fig(file_hash, _file_bytes):
+    return build_gantt(load_contracts(file_hash, _file_bytes)['gantt'])
+
+KPI_SUBSETS = {
+    'top5': "Top 5 Contracts by Value",
+    'others': "Remaining Contracts by Value",
+}
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def kpi_fig(file_hash, _file_bytes, which):
+    return build_kpi_bar(load_contracts(file_hash, _file_bytes)[which], KPI_SUBSETS[which])
+
+
+# --- Main Processing ---
+if contract_file:
+    contract_bytes = contract_file.getvalue()
+    contracts = load_contracts(contract_hash, contract_bytes)
+    df_display = contracts['display']
 
     # --- Metrics Display ---
+    metrics = contracts['metrics']
     col1, col2 = st.columns(2)
     with col1:
-        st.markdown(metric_card("Total Contracts", len(df), "All listed contracts", "📦"), unsafe_allow_html=True)
-        st.markdown(metric_card("Active Contracts", df[df['STATUS'] == 'ACTIVE'].shape[0], "Currently ongoing", "✅"), unsafe_allow_html=True)
+        st.markdown(metric_card("Total Contracts", metrics['total'], "All listed contracts", "📦"), unsafe_allow_html=True)
+        st.markdown(metric_card("Active Contracts", metrics['active'], "Currently ongoing", "✅"), unsafe_allow_html=True)
     with col2:
-        st.markdown(metric_card("Non-Active Contracts", df[df['STATUS'].str.contains('NON ACTIVE', case=False, na=False)].shape[0], "Finished or inactive", "🔝"), unsafe_allow_html=True)
-        st.markdown(metric_card("Active Adendum Contracts", df[df['STATUS'].str.contains('ADENDUM', case=False, na=False)].shape[0], "Contracts with Adendum", "📝"), unsafe_allow_html=True)
+        st.markdown(metric_card("Non-Active Contracts", metrics['non_active'], "Finished or inactive", "🔝"), unsafe_allow_html=True)
+        st.markdown(metric_card("Active Adendum Contracts", metrics['adendum'], "Contracts with Adendum", "📝"), unsafe_allow_html=True)
 
     # --- Gantt Chart ---
     with section_card("🗖️ Gantt Chart - Contract Timelines"):
-        df_plot = df.dropna(subset=['START', 'END'])
-        fig_gantt = px.timeline(df_plot.sort_values('START'), x_start='START', x_end='END', y='KONTRAK', color='STATUS',
-                                hover_data=['DURATION', 'PROGRESS', 'TIME_GONE'])
-        fig_gantt.update_yaxes(autorange='reversed')
-        st.plotly_chart(fig_gantt, use_container_width=True)
+        st.plotly_chart(gantt_fig(contract_hash, contract_bytes), use_container_width=True)
 
     # --- Top 5 Chart ---
-    df_chart = df.copy()
-    df_chart.rename(columns={'Nilai Kontrak 2023-2024': 'CONTRACT_VALUE', 'Realisasi On  2023-2024': 'REALIZATION'}, inplace=True)
-    df_chart = df_chart[df_chart['CONTRACT_VALUE'].notna() & df_chart['REALIZATION'].notna()]
-    df_chart['REMAINING'] = df_chart['CONTRACT_VALUE'] - df_chart['REALIZATION']
-    df_chart[['REALIZATION', 'REMAINING']] = df_chart[['REALIZATION', 'REMAINING']].clip(lower=0)
-    df_chart['REALIZED_PCT'] = (df_chart['REALIZATION'] / df_chart['CONTRACT_VALUE'] * 100).round(1)
-    df_chart.sort_values(by='CONTRACT_VALUE', ascending=False, inplace=True)
-
-    top5 = df_chart.head(5)
-    others = df_chart.iloc[5:]
-
     with section_card("📊 Top 5 Contracts (Realization % and Conditional Color)"):
-        st.plotly_chart(build_kpi_bar(top5, "Top 5 Contracts by Value"), use_container_width=True)
+        st.plotly_chart(kpi_fig(contract_hash, contract_bytes, 'top5'), use_container_width=True)
 
     with section_card("📊 Remaining Contracts (Scaled View)"):
-        st.plotly_chart(build_kpi_bar(others, "Remaining Contracts by Value"), use_container_width=True)
+        st.plotly_chart(kpi_fig(contract_hash, contract_bytes, 'others'), use_container_width=True)
 
 
 
@@ -242,12 +481,7 @@ if contract_file:
 
     # --- Time-Based Progress Category ---
         with section_card("📈 Project Progress Categories (Based on Time Elapsed)"):
-            bins = [-1, 30, 50, 80, 100]
-            labels = ['<30%', '30-50%', '50-80%', '>80%']
-            df['TIME_GONE_CAT'] = pd.cut(df['TIME_GONE'], bins=bins, labels=labels)
-
-            progress_counts = df['TIME_GONE_CAT'].value_counts().sort_index().reset_index()
-            progress_counts.columns = ['Progress Range', 'Count']
+            progress_counts = contracts['progress_counts']
             fig_progress = px.bar(progress_counts, x='Progress Range', y='Count', color='Progress Range',
                                 title="Project Progress by Time Elapsed", text='Count')
             st.plotly_chart(fig_progress, use_container_width=True)
@@ -257,103 +491,27 @@ if contract_file:
         col_pie, col_table = st.columns(2)
 
         with col_pie:
-            status_counts = df['STATUS'].value_counts().reset_index()
-            status_counts.columns = ['Status', 'Count']
-            fig_status = px.pie(status_counts, names='Status', values='Count', hole=0.4)
+            # Cap the wedges: a long tail of statuses is folded into a single "Other" slice
+            status_counts = contracts['status_counts']
+            pie_counts = status_counts.head(PIE_MAX_SLICES)
+            pie_counts.index = pie_counts.index.astype(str)
+            if len(status_counts) > PIE_MAX_SLICES:
+                pie_counts['Other'] = status_counts.iloc[PIE_MAX_SLICES:].sum()
+            pie_counts = pie_counts.rename_axis('Status').reset_index(name='Count')
+            fig_status = px.pie(pie_counts, names='Status', values='Count', hole=0.4)
+            fig_status.update_traces(sort=False)
             st.plotly_chart(fig_status, use_container_width=True)
 
         with col_table:
-            status_filter = st.selectbox("Select Status", options=["All"] + df['STATUS'].unique().tolist())
-            if status_filter == "All":
-                filtered_df = df
-            else:
-                filtered_df = df[df['STATUS'] == status_filter]
-
-            st.dataframe(filtered_df[['KONTRAK', 'START', 'END', 'DURATION', 'STATUS', 'PROGRESS', 'TIME_GONE']].sort_values('END'), use_container_width=True)
+            status_table(df_display, contracts['status_groups'])
 
 
 if financial_file:
-    df_financial = pd.read_excel(financial_file)
+    df_financial = load_financials(financial_hash, financial_file.getvalue())
     st.success("Financial progress file loaded!")
 
-    import plotly.graph_objects as go
-
-    def get_color(pct):
-        return '#2ECC71' if pct >= 50 else '#E74C3C'
-
-    def build_kpi_bar(df_subset, title="Progress Pembayaran (%)"):
-        fig = go.Figure()
-
-        show_legend_realized = True
-        show_legend_remaining = True
-
-        for _, row in df_subset.iterrows():
-            kontrak_name = row['Vendor']
-            pct = row['REALIZED_PCT']
-            remaining_pct = 100 - pct
-            realized_value = row['REALIZATION']
-            remaining_value = row['REMAINING']
-            contract_value = row['CONTRACT_VALUE']
-
-            # Bar: Realisasi (Hijau)
-            fig.add_trace(go.Bar(
-                y=[kontrak_name],
-                x=[pct],
-                name='REALIZED (%)' if show_legend_realized else None,
-                orientation='h',
-                marker_color=get_color(pct),
-                text=f"{pct:.1f}%",
-                textposition='inside',
-                hovertemplate=(
-                    f"<b>{kontrak_name}</b><br>"
-                    f"Total Kontrak: Rp {contract_value:,.0f}<br>"
-                    f"Terbayarkan: Rp {realized_value:,.0f} ({pct:.1f}%)<br>"
-                    f"Sisa: Rp {remaining_value:,.0f} ({remaining_pct:.1f}%)<extra></extra>"
-                ),
-                showlegend=show_legend_realized
-            ))
-            show_legend_realized = False
-
-            # Bar: Sisa (Abu)
-            fig.add_trace(go.Bar(
-                y=[kontrak_name],
-                x=[remaining_pct],
-                name='REMAINING (%)' if show_legend_remaining else None,
-                orientation='h',
-                marker_color="#D0D3D4",
-                text=f"{remaining_pct:.1f}%",
-                textposition='inside',
-                hovertemplate=(
-                    f"<b>{kontrak_name}</b><br>"
-                    f"Total Kontrak: Rp {contract_value:,.0f}<br>"
-                    f"Terbayarkan: Rp {realized_value:,.0f} ({pct:.1f}%)<br>"
-                    f"Sisa: Rp {remaining_value:,.0f} ({remaining_pct:.1f}%)<extra></extra>"
-                ),
-                showlegend=show_legend_remaining
-            ))
-            show_legend_remaining = False
-
-        fig.update_layout(
-            barmode='stack',
-            title=title,
-            xaxis=dict(title="Progress (%)", range=[0, 100]),
-            yaxis=dict(title="", automargin=True),
-            height=700,
-            margin=dict(l=300, r=50, t=60, b=50),
-            dragmode=False,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
-        )
-
-        return fig
-
     with section_card("📊 Financial Progress Chart (from Uploaded File)"):
-        fig_fin = build_kpi_bar(df_financial, "Progress Pembayaran Seluruh Kontrak")
+        fig_fin = build_financial_bar(df_financial, "Progress Pembayaran Seluruh Kontrak")
         st.plotly_chart(fig_fin, use_container_width=True, config={
             'scrollZoom': False,
             'displaylogo': False,
@@ -1,9 +1,67 @@
+import streamlit as st
 import pandas as pd
 import unicodedata, re
+import importlib.util
+import hashlib
+from io import BytesIO
+import requests
+from requests.adapters import HTTPAdapter
+
+# Prefer the Rust calamine reader; without it, stream the sheet through openpyxl's
+# read-only mode using cached formula values instead of building the full workbook
+if importlib.util.find_spec("python_calamine"):
+    EXCEL_ENGINE_KWARGS = {'engine': 'calamine'}
+else:
+    EXCEL_ENGINE_KWARGS = {
+        'engine': 'openpyxl',
+        'engine_kwargs': {'read_only': True, 'data_only': True, 'keep_vba': False},
+    }
 
 def clean_text(x):
     if pd.isna(x):
         return ''
     x = unicodedata.normalize('NFKD', str(x)).encode('ascii', 'ignore').decode('utf-8')
     x = re.sub(r'\s+', ' ', x)
-    return x.strip().upper()
\ No newline at end of file
+    return x.strip().upper()
+
+def read_excel(file, **kwargs):
+    return pd.read_excel(file, **EXCEL_ENGINE_KWARGS, **kwargs)
+
+def to_datetime(col):
+    # Excel date cells already arrive as datetime64; only text cells need parsing
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    parsed = pd.to_datetime(col, format="ISO8601", errors='coerce', cache=True)
+    # Hand-typed dates in other layouts miss the ISO fast path; re-parse only those with inference
+    retry = col.notna() & parsed.isna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(col[retry], errors='coerce')
+    return parsed
+
+def get_file_hash(file):
+    # Only a cache/session key, not a security boundary: BLAKE2b is much faster than MD5
+    return hashlib.blake2b(file.getvalue(), digest_size=16).hexdigest()
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+@st.cache_resource
+def get_http_session():
+    # One pooled connection per host, reused across reruns and sessions
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+    return session
+
+# Cache the immutable payload, not a BytesIO whose read cursor would be shared
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_excel_from_github(url):
+    with get_http_session().get(url, stream=True, timeout=15) as response:
+        if response.status_code != 200:
+            return None
+        buf = BytesIO()
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            buf.write(chunk)
+        # Content-Length counts encoded bytes, so it can only be checked on an identity body
+        expected = response.headers.get('Content-Length')
+        if expected and not response.headers.get('Content-Encoding') and buf.tell() != int(expected):
+            return None
+        return buf.getvalue()
\ No newline at end of file